@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Disk cache for Gemini semantic match results.
+L1: exact hash of (normalized task, candidate skill names).
+L2: cosine similarity of task embeddings, when the caller has one.
+Output: .agent/sfo/llm_cache/semantic_match.json
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+TTL_SECONDS = 24 * 60 * 60
+SIMILARITY_THRESHOLD = 0.95
+
+# Serializes read-modify-write in put() when called from worker threads
+_WRITE_LOCK = threading.Lock()
+
+
+def _get_cache_file() -> Path:
+    """Get cache file path."""
+    script_dir = Path(__file__).parent
+    return script_dir.parent.parent.parent / "sfo" / "llm_cache" / "semantic_match.json"
+
+
+def _skills_key(skill_names: list[str]) -> str:
+    """Hash the candidate skill set."""
+    payload = json.dumps(sorted(skill_names))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_key(task: str, skill_names: list[str]) -> str:
+    """Exact-match key for a task against a candidate skill set."""
+    payload = json.dumps(
+        {"task": task.strip().lower(), "skills": sorted(skill_names)},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    """Scale vector to unit length so cosine is a plain dot product."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return list(vector)
+    return [x / norm for x in vector]
+
+
+def _load_entries() -> dict:
+    """Load unexpired cache entries."""
+    cache_file = _get_cache_file()
+    if not cache_file.exists():
+        return {}
+
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+    cutoff = time.time() - TTL_SECONDS
+    return {k: e for k, e in entries.items() if e.get('created_at', 0) >= cutoff}
+
+
+def get(task: str, skill_names: list[str],
+        embedding: Optional[list[float]] = None) -> Optional[list[dict]]:
+    """Return a cached result for task, or None on miss."""
+    entries = _load_entries()
+
+    # L1: exact task + skill set
+    entry = entries.get(cache_key(task, skill_names))
+    if entry:
+        return entry['result']
+
+    # L2: nearest cached task embedding for the same skill set
+    if embedding is None:
+        return None
+
+    query = _normalize(embedding)
+    skills_key = _skills_key(skill_names)
+    best_score, best_result = 0.0, None
+    for entry in entries.values():
+        cached = entry.get('embedding')
+        if not cached or entry.get('skills_key') != skills_key:
+            continue
+        score = sum(a * b for a, b in zip(query, cached))
+        if score > best_score:
+            best_score, best_result = score, entry['result']
+
+    if best_score >= SIMILARITY_THRESHOLD:
+        return best_result
+    return None
+
+
+def put(task: str, skill_names: list[str], result: list[dict],
+        embedding: Optional[list[float]] = None):
+    """Store a result, dropping expired entries."""
+    with _WRITE_LOCK:
+        entries = _load_entries()
+        entries[cache_key(task, skill_names)] = {
+            "created_at": time.time(),
+            "skills_key": _skills_key(skill_names),
+            "embedding": _normalize(embedding) if embedding is not None else None,
+            "result": result
+        }
+
+        cache_file = _get_cache_file()
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(tmp_file, cache_file)
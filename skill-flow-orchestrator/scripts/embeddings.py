@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Local sentence embeddings for semantic skill matching.
+Runs a MiniLM sentence-transformer exported to ONNX (INT8 quantized)
+with onnxruntime, so ranking needs no API call.
+
+Model directory: $SFO_EMBED_MODEL or .agent/sfo/models/all-MiniLM-L6-v2/
+containing model.onnx and tokenizer.json.
+"""
+
+import os
+import base64
+import hashlib
+import argparse
+import functools
+from pathlib import Path
+from typing import Optional
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:
+    np = ort = Tokenizer = None
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+MAX_TOKENS = 256
+BATCH_SIZE = 32
+
+
+def get_model_dir() -> Path:
+    """Get embedding model directory path."""
+    env_dir = os.getenv('SFO_EMBED_MODEL')
+    if env_dir:
+        return Path(env_dir)
+    script_dir = Path(__file__).parent
+    return script_dir.parent.parent.parent / "sfo" / "models" / MODEL_NAME
+
+
+def is_available() -> bool:
+    """Check that runtime dependencies and model files are present."""
+    if ort is None:
+        return False
+    model_dir = get_model_dir()
+    return (model_dir / "model.onnx").exists() and (model_dir / "tokenizer.json").exists()
+
+
+def model_id() -> Optional[str]:
+    """Identify the installed model by name and file stats, or None."""
+    if not is_available():
+        return None
+    model_dir = get_model_dir()
+    stats = []
+    for name in ("model.onnx", "tokenizer.json"):
+        st = (model_dir / name).stat()
+        stats.append((name, st.st_size, st.st_mtime_ns))
+    digest = hashlib.sha256(repr(stats).encode()).hexdigest()
+    return f"{model_dir.name}@{digest[:16]}"
+
+
+@functools.lru_cache(maxsize=1)
+def _load_model(model_dir: str):
+    """Load ONNX session and tokenizer once."""
+    session = ort.InferenceSession(
+        str(Path(model_dir) / "model.onnx"),
+        providers=["CPUExecutionProvider"]
+    )
+    tokenizer = Tokenizer.from_file(str(Path(model_dir) / "tokenizer.json"))
+    tokenizer.enable_truncation(max_length=MAX_TOKENS)
+    tokenizer.enable_padding()
+    return session, tokenizer
+
+
+def embed(texts: list[str]) -> Optional['np.ndarray']:
+    """Embed texts as unit-length float32 rows, or None if unavailable."""
+    if not texts or not is_available():
+        return None
+
+    session, tokenizer = _load_model(str(get_model_dir()))
+    return np.concatenate([
+        _embed_batch(session, tokenizer, texts[i:i + BATCH_SIZE])
+        for i in range(0, len(texts), BATCH_SIZE)
+    ])
+
+
+def _embed_batch(session, tokenizer, texts: list[str]) -> 'np.ndarray':
+    """Embed one padded batch."""
+    encodings = tokenizer.encode_batch(texts)
+    feeds = {
+        "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+        "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+    }
+    input_names = {i.name for i in session.get_inputs()}
+    token_states = session.run(
+        None, {k: v for k, v in feeds.items() if k in input_names}
+    )[0]
+
+    # Mean pooling over real tokens, then L2 normalize
+    mask = feeds["attention_mask"][..., None].astype(np.float32)
+    pooled = (token_states * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.maximum(norms, 1e-9)).astype(np.float32)
+
+
+def encode_vector(vector: 'np.ndarray') -> str:
+    """Pack an embedding as base64 float16 for the JSON index."""
+    return base64.b64encode(vector.astype(np.float16).tobytes()).decode('ascii')
+
+
+def decode_vector(data: str) -> 'np.ndarray':
+    """Unpack an embedding written by encode_vector."""
+    return np.frombuffer(base64.b64decode(data), dtype=np.float16).astype(np.float32)
+
+
+def quantize(src: Path, dst: Path):
+    """Quantize an FP32 ONNX model to INT8 weights."""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prepare the local embedding model')
+    parser.add_argument('src', type=Path, help='FP32 model.onnx exported from sentence-transformers')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='Output path (default: model dir/model.onnx)')
+
+    args = parser.parse_args()
+
+    if ort is None:
+        print("❌ onnxruntime, tokenizers and numpy are required.")
+        return
+
+    output = args.output or get_model_dir() / "model.onnx"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    quantize(args.src, output)
+
+    print(f"✅ INT8 model written: {output}")
+    if not (output.parent / "tokenizer.json").exists():
+        print(f"⚠️ Copy the model's tokenizer.json to {output.parent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,33 @@ Uses Google Gemini API for semantic understanding.
 import os
 import re
 import json
+import heapq
+import asyncio
 import argparse
+import functools
 from pathlib import Path
+from typing import Optional, TypedDict
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
+import _llm_cache
+import embeddings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from rapidfuzz import process, fuzz
+except ImportError:
+    process = fuzz = None
+
 # Load environment variables
 env_paths = [
     Path(__file__).parent / '.env',
@@ -23,9 +46,191 @@ for env_path in env_paths:
         load_dotenv(env_path)
         break
 
+# Task tokenizer, shared by every skill scored for a task
+_TASK_TOK = re.compile(r'\b[a-z][a-z0-9-]{2,}\b')
+
+# Below this many skills the per-skill loop is already cheap
+_VECTORIZE_MIN_SKILLS = 50
+
+# A task word hits a keyword when one is a prefix of the other (both 3+
+# chars) and fuzz.ratio clears this cutoff, i.e. the longer is at most
+# 1.5x the shorter: "react"/"reactjs", "test"/"tests", not "test"/"latest"
+_FUZZY_CUTOFF = 80
+_FUZZY_MIN_LEN = 3
+
+
+class SkillMatch(TypedDict):
+    """One ranked skill returned by Gemini."""
+    name: str
+    score: float
+    reason: str
+
+
+# Gemini response schema for list[SkillMatch]
+_SKILL_MATCHES_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "name": {"type": "STRING"},
+            "score": {"type": "NUMBER"},
+            "reason": {"type": "STRING"}
+        },
+        "required": ["name", "score", "reason"]
+    }
+}
+
+
+@dataclass
+class KeywordBitmaps:
+    """Per-skill token sets packed as bit rows over a shared vocabulary."""
+    vocab: dict
+    keywords: 'np.ndarray'
+    names: 'np.ndarray'
+    descriptions: 'np.ndarray'
+    keyword_counts: 'np.ndarray'
+    name_counts: 'np.ndarray'
+    has_terms: 'np.ndarray'
+    words: int
+
+
+def token_mask(tokens) -> int:
+    """64-bit signature of a token set, one hash bit per token.
+
+    Disjoint signatures mean disjoint sets; overlapping ones may collide.
+    """
+    mask = 0
+    for token in tokens:
+        mask |= 1 << (hash(token) & 63)
+    return mask
+
+
+def _prepare_skill(skill: dict) -> None:
+    """Precompute the per-skill fields keyword_match needs.
+
+    Indexes written by scan_skills.py carry name_words and
+    description_tokens; older indexes fall back to deriving them here.
+    """
+    name_words = skill.get('name_words')
+    if name_words is None:
+        name_words = skill.get('name', '').lower().replace('-', ' ').split()
+    description_tokens = skill.get('description_tokens')
+    if description_tokens is None:
+        description_tokens = _TASK_TOK.findall(
+            skill.get('description', '').lower()
+        )
+
+    skill['_keywords'] = frozenset(skill.get('keywords', []))
+    skill['_name_words'] = frozenset(name_words)
+    skill['_name_mask'] = token_mask(skill['_name_words'])
+    skill['_description_tokens'] = frozenset(description_tokens)
+
+
+def _pack_rows(rows: list, vocab: dict, words: int) -> 'np.ndarray':
+    """Pack token sets into uint64 bit rows, one row per set."""
+    bits = np.zeros((len(rows), words * 64), dtype=bool)
+    for i, tokens in enumerate(rows):
+        bits[i, [vocab[t] for t in tokens if t in vocab]] = True
+    return np.packbits(bits, axis=1).view(np.uint64)
+
+
+def build_keyword_bitmaps(skills: list[dict]) -> KeywordBitmaps:
+    """Build bitmaps for the prepared skills of an index."""
+    vocab = {}
+    for skill in skills:
+        for tokens in (skill['_keywords'], skill['_name_words'],
+                       skill['_description_tokens']):
+            for token in tokens:
+                vocab.setdefault(token, len(vocab))
+    words = max(1, -(-len(vocab) // 64))
+
+    return KeywordBitmaps(
+        vocab=vocab,
+        keywords=_pack_rows([s['_keywords'] for s in skills], vocab, words),
+        names=_pack_rows([s['_name_words'] for s in skills], vocab, words),
+        descriptions=_pack_rows(
+            [s['_description_tokens'] for s in skills], vocab, words
+        ),
+        keyword_counts=np.array(
+            [min(len(s['_keywords']), 20) for s in skills], dtype=np.float64
+        ),
+        name_counts=np.array(
+            [len(s['_name_words']) for s in skills], dtype=np.float64
+        ),
+        has_terms=np.array(
+            [bool(s['_keywords'] or s['_name_words']) for s in skills]
+        ),
+        words=words
+    )
+
+
+def _popcount_rows(bits: 'np.ndarray') -> 'np.ndarray':
+    """Count set bits per row."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(bits.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def keyword_match_all(task_words: frozenset[str], bitmaps: KeywordBitmaps,
+                      word_hits: Optional[dict] = None) -> 'np.ndarray':
+    """Vectorized keyword_match over every skill in the index."""
+    task_bits = _pack_rows([task_words], bitmaps.vocab, bitmaps.words)
+
+    name_matches = _popcount_rows(bitmaps.names & task_bits)
+    if word_hits is None:
+        keyword_matches = _popcount_rows(bitmaps.keywords & task_bits)
+    elif word_hits:
+        # One row per task word; it counts once if any of its hits is present
+        hit_rows = _pack_rows(list(word_hits.values()), bitmaps.vocab, bitmaps.words)
+        keyword_matches = (
+            (bitmaps.keywords[:, None, :] & hit_rows[None, :, :]).any(axis=2)
+        ).sum(axis=1, dtype=np.int64)
+    else:
+        keyword_matches = np.zeros(len(bitmaps.keywords), dtype=np.int64)
+    desc_matches = _popcount_rows(bitmaps.descriptions & task_bits)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Same terms and weights as keyword_match
+        scores = np.where(
+            name_matches > 0, 0.4 * (name_matches / bitmaps.name_counts), 0.0
+        )
+        scores += np.where(
+            bitmaps.keyword_counts > 0,
+            0.35 * (keyword_matches / bitmaps.keyword_counts), 0.0
+        )
+    if task_words:
+        scores += 0.25 * np.minimum(desc_matches / len(task_words), 1.0)
+
+    scores = np.minimum(scores, 1.0)
+    scores[~bitmaps.has_terms] = 0.0
+    return scores
+
+
+@functools.lru_cache(maxsize=4)
+def _load_index_cached(path_str: str, mtime_ns: int) -> dict:
+    """Parse skill index once per (path, mtime)."""
+    if orjson:
+        index = orjson.loads(Path(path_str).read_bytes())
+    else:
+        with open(path_str, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    skills = index.get('skills', [])
+    for skill in skills:
+        _prepare_skill(skill)
+    index['_keyword_vocab'] = sorted(
+        set().union(*(s['_keywords'] for s in skills))
+    )
+    if np is not None and len(skills) >= _VECTORIZE_MIN_SKILLS:
+        index['_bitmaps'] = build_keyword_bitmaps(skills)
+    if np is not None and skills and all(s.get('embedding') for s in skills):
+        vectors = [embeddings.decode_vector(s['embedding']) for s in skills]
+        if {len(v) for v in vectors} == {index.get('embedding_dim')}:
+            index['_embeddings'] = np.stack(vectors)
+    return index
+
 
 def load_skill_index() -> dict:
-    """Load skill index from JSON."""
+    """Load skill index from JSON (cached until the file changes)."""
     script_dir = Path(__file__).parent
     sfo_dir = script_dir.parent.parent.parent / "sfo"
     index_file = sfo_dir / "skill_index.json"
@@ -34,139 +239,347 @@ def load_skill_index() -> dict:
         print("❌ Skill index not found. Run scan_skills.py first.")
         return {"skills": []}
     
-    with open(index_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    mtime_ns = index_file.stat().st_mtime_ns
+    return _load_index_cached(str(index_file), mtime_ns)
 
 
-def keyword_match(task: str, skill: dict) -> float:
-    """Calculate keyword match score with weighted relevance."""
-    task_lower = task.lower()
-    task_words = set(re.findall(r'\b[a-z][a-z0-9-]{2,}\b', task_lower))
-    keywords = set(skill.get('keywords', []))
-    skill_name = skill.get('name', '').lower().replace('-', ' ')
-    description = skill.get('description', '').lower()
+def _is_fuzzy_hit(word: str, keyword: str) -> bool:
+    """Prefix guard applied to pairs that passed the fuzz.ratio cutoff."""
+    if word == keyword:
+        return True
+    short, long = sorted((word, keyword), key=len)
+    return len(short) >= _FUZZY_MIN_LEN and long.startswith(short)
+
+
+def fuzzy_keyword_hits(task_words: frozenset[str],
+                       keyword_vocab: list[str]) -> Optional[dict]:
+    """Map each task word to the index keywords it fuzzy-matches.
+
+    Catches near misses like "postgres" vs "postgresql". Task words with
+    no hit are left out. Returns None without rapidfuzz, in which case
+    keywords match task words exactly.
+    """
+    if process is None or np is None or not task_words or not keyword_vocab:
+        return None
+
+    words = list(task_words)
+    scores = process.cdist(
+        words, keyword_vocab,
+        scorer=fuzz.ratio, score_cutoff=_FUZZY_CUTOFF, workers=-1
+    )
+    word_hits = {}
+    for i, j in zip(*np.nonzero(scores)):
+        word, keyword = words[i], keyword_vocab[j]
+        if _is_fuzzy_hit(word, keyword):
+            word_hits.setdefault(word, set()).add(keyword)
+    return {word: frozenset(hits) for word, hits in word_hits.items()}
+
+
+def keyword_match(task_words: frozenset[str], skill: dict,
+                  word_hits: Optional[dict] = None,
+                  task_mask: Optional[int] = None) -> float:
+    """Calculate keyword match score with weighted relevance.
+
+    task_words is the tokenized task, see _TASK_TOK. word_hits, from
+    fuzzy_keyword_hits, lets a task word match keywords fuzzily.
+    task_mask is token_mask(task_words), precomputed per task.
+    """
+    if task_mask is None:
+        task_mask = token_mask(task_words)
+
+    keywords = skill['_keywords']
+    name_words = skill['_name_words']
+    description_tokens = skill['_description_tokens']
     
-    if not keywords and not skill_name:
+    if not keywords and not name_words:
         return 0.0
     
     score = 0.0
     
-    # 1. Skill name matching (high weight)
-    name_words = set(skill_name.split())
-    name_matches = len(task_words & name_words)
-    if name_matches > 0:
-        score += 0.4 * (name_matches / len(name_words))
+    # 1. Skill name matching (high weight), most skills fail the mask test
+    if task_mask & skill['_name_mask']:
+        name_matches = len(task_words & name_words)
+        if name_matches > 0:
+            score += 0.4 * (name_matches / len(name_words))
     
-    # 2. Keyword overlap (medium weight)
-    keyword_matches = len(task_words & keywords)
+    # 2. Keyword overlap (medium weight), counting distinct task words
+    if word_hits is None:
+        keyword_matches = len(task_words & keywords)
+    else:
+        keyword_matches = sum(
+            1 for hits in word_hits.values() if not hits.isdisjoint(keywords)
+        )
     if keywords:
         score += 0.35 * (keyword_matches / min(len(keywords), 20))
     
     # 3. Task words in description (low weight for semantic relevance)
-    desc_matches = sum(1 for w in task_words if w in description)
+    desc_matches = len(task_words & description_tokens)
     if task_words:
         score += 0.25 * min(desc_matches / len(task_words), 1.0)
     
     return min(score, 1.0)
 
 
-def semantic_match_gemini(task: str, skills: list[dict]) -> list[dict]:
-    """Use Gemini API for semantic matching."""
+# Shared Gemini client and the API key it was built with
+_GENAI_CLIENT = None
+_GENAI_CLIENT_KEY: Optional[str] = None
+
+
+def _get_client():
+    """Get the shared Gemini client, or None if unavailable.
+
+    Reusing one client keeps its HTTP connection pool warm across calls.
+    """
+    global _GENAI_CLIENT, _GENAI_CLIENT_KEY
+    
     try:
         from google import genai
     except ImportError:
         print("⚠️ google-genai not installed. Using keyword matching only.")
-        return []
+        return None
     
     api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
     if not api_key:
         print("⚠️ GEMINI_API_KEY not set. Using keyword matching only.")
-        return []
-    
-    client = genai.Client(api_key=api_key)
+        return None
     
+    if _GENAI_CLIENT is None or _GENAI_CLIENT_KEY != api_key:
+        _GENAI_CLIENT = genai.Client(api_key=api_key)
+        _GENAI_CLIENT_KEY = api_key
+    return _GENAI_CLIENT
+
+
+def _gemini_prompt(task: str, candidates: list[dict]) -> str:
+    """Build the semantic matching prompt."""
     # Build skill descriptions for matching
     skill_list = "\n".join([
-        f"- {s['name']}: {s['description'][:200]}"
-        for s in skills[:20]  # Limit to top 20 for token efficiency
+        f"- {s['name']}: {s['description'][:80]}"
+        for s in candidates
     ])
     
-    prompt = f"""Given this task: "{task}"
+    return f"""Given this task: "{task}"
 
 And these available skills:
 {skill_list}
 
-Return a JSON array of the top 5 most relevant skills for this task, ranked by relevance.
-Format: [{{"name": "skill-name", "score": 0.95, "reason": "why relevant"}}]
+Return the top 5 most relevant skills for this task, ranked by relevance, with a 0-1 score and a short reason."""
+
+
+def _gemini_config():
+    """Request strict JSON matching list[SkillMatch], deterministically."""
+    from google.genai import types
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=_SKILL_MATCHES_SCHEMA,
+        temperature=0.0
+    )
 
-Only return valid JSON, no markdown or explanation."""
 
+def semantic_match_gemini(task: str, skills: list[dict],
+                          task_embedding: Optional[list[float]] = None) -> list[SkillMatch]:
+    """Use Gemini API for semantic matching.
+
+    Results are cached on disk for 24h, see _llm_cache. task_embedding
+    enables the similarity lookup for near-duplicate tasks.
+    """
+    candidates = skills[:20]  # Limit to top 20 for token efficiency
+    skill_names = [s['name'] for s in candidates]
+    cached = _llm_cache.get(task, skill_names, task_embedding)
+    if cached is not None:
+        return cached
+    
+    client = _get_client()
+    if client is None:
+        return []
+    
     try:
         response = client.models.generate_content(
             model='gemini-2.0-flash',
-            contents=prompt
+            contents=_gemini_prompt(task, candidates),
+            config=_gemini_config()
         )
-        
-        # Parse response
-        text = response.text.strip()
-        # Remove markdown code blocks if present
-        text = re.sub(r'^```json\s*', '', text)
-        text = re.sub(r'\s*```$', '', text)
-        
-        return json.loads(text)
+        results = json.loads(response.text)
+        _llm_cache.put(task, skill_names, results, task_embedding)
+        return results
     except Exception as e:
         print(f"⚠️ Gemini API error: {e}")
         return []
 
 
-def match_skills(task: str, use_ai: bool = True) -> list[dict]:
-    """Match skills to task using hybrid approach."""
-    index = load_skill_index()
-    skills = index.get('skills', [])
+async def semantic_match_gemini_async(task: str, skills: list[dict],
+                                      task_embedding: Optional[list[float]] = None) -> list[SkillMatch]:
+    """Async semantic_match_gemini, for running several matches concurrently."""
+    candidates = skills[:20]  # Limit to top 20 for token efficiency
+    skill_names = [s['name'] for s in candidates]
+    cached = await asyncio.to_thread(_llm_cache.get, task, skill_names, task_embedding)
+    if cached is not None:
+        return cached
+    
+    client = _get_client()
+    if client is None:
+        return []
+    
+    try:
+        response = await client.aio.models.generate_content(
+            model='gemini-2.0-flash',
+            contents=_gemini_prompt(task, candidates),
+            config=_gemini_config()
+        )
+        results = json.loads(response.text)
+        await asyncio.to_thread(_llm_cache.put, task, skill_names, results, task_embedding)
+        return results
+    except Exception as e:
+        print(f"⚠️ Gemini API error: {e}")
+        return []
+
+
+def _keyword_scored_skills(task: str, index: dict) -> list[dict]:
+    """Step 1 of matching: copies of all indexed skills with keyword_score."""
+    # Copy so per-task scores never leak into the cached index
+    skills = [dict(s) for s in index.get('skills', [])]
     
     if not skills:
         return []
     
-    # Step 1: Keyword matching for initial ranking
-    for skill in skills:
-        skill['keyword_score'] = keyword_match(task, skill)
+    task_words = frozenset(_TASK_TOK.findall(task.lower()))
+    word_hits = fuzzy_keyword_hits(task_words, index['_keyword_vocab'])
+    bitmaps = index.get('_bitmaps')
+    if bitmaps is not None:
+        scores = keyword_match_all(task_words, bitmaps, word_hits)
+        for skill, score in zip(skills, scores.tolist()):
+            skill['keyword_score'] = score
+    else:
+        task_mask = token_mask(task_words)
+        for skill in skills:
+            skill['keyword_score'] = keyword_match(
+                task_words, skill, word_hits, task_mask
+            )
     
-    # Sort by keyword score
-    skills_sorted = sorted(skills, key=lambda s: s['keyword_score'], reverse=True)
+    return skills
+
+
+def _apply_local_semantic_scores(task: str, index: dict,
+                                 skills: list[dict]) -> Optional['np.ndarray']:
+    """Set each skill's semantic_score from embedding similarity, see embeddings.py.
+
+    Returns the task embedding, or None (leaving skills untouched) without
+    a local model or precomputed skill embeddings from that same model.
+    """
+    skill_vectors = index.get('_embeddings')
+    if skill_vectors is None:
+        return None
+    model_id = embeddings.model_id()
+    if model_id is None:
+        return None
+    if index.get('embedding_model') != model_id:
+        print("⚠️ Skill embeddings are from another model. Re-run scan_skills.py.")
+        return None
+    task_vectors = embeddings.embed([task])
+    if task_vectors is None or task_vectors.shape[1] != skill_vectors.shape[1]:
+        return None
     
-    # Step 2: AI semantic matching for refinement
-    if use_ai:
-        ai_results = semantic_match_gemini(task, skills_sorted)
+    # Rows are unit length, so the dot product is the cosine
+    similarities = skill_vectors @ task_vectors[0]
+    for skill, similarity in zip(skills, similarities.tolist()):
+        skill['semantic_score'] = max(similarity, 0.0)
+        skill['reason'] = f"Embedding similarity {similarity:.2f}"
+    return task_vectors[0]
+
+
+def _prerank_score(skill: dict) -> float:
+    """Score before Gemini: 40% keyword + 60% embedding when available."""
+    if 'semantic_score' in skill:
+        return 0.4 * skill['keyword_score'] + 0.6 * skill['semantic_score']
+    return skill['keyword_score']
+
+
+def _top_for_ai(skills: list[dict]) -> list[dict]:
+    """Only the top 20 by pre-rank score are sent to Gemini."""
+    return heapq.nlargest(20, skills, key=_prerank_score)
+
+
+def _rank_skills(skills: list[dict], ai_results: list[SkillMatch],
+                 top_k: Optional[int]) -> list[dict]:
+    """Step 2 of matching: merge AI scores and rank."""
+    if ai_results:
+        # Merge AI scores with keyword scores
+        ai_scores = {r['name']: r for r in ai_results}
         
-        if ai_results:
-            # Merge AI scores with keyword scores
-            ai_scores = {r['name']: r for r in ai_results}
-            
-            for skill in skills_sorted:
-                if skill['name'] in ai_scores:
-                    ai_data = ai_scores[skill['name']]
-                    skill['ai_score'] = ai_data.get('score', 0)
-                    skill['reason'] = ai_data.get('reason', '')
-                    # Combined score: 40% keyword + 60% AI
-                    skill['final_score'] = (
-                        0.4 * skill['keyword_score'] + 
-                        0.6 * skill['ai_score']
-                    )
-                else:
-                    skill['ai_score'] = 0
-                    skill['final_score'] = skill['keyword_score'] * 0.4
+        for skill in skills:
+            if skill['name'] in ai_scores:
+                ai_data = ai_scores[skill['name']]
+                skill['ai_score'] = ai_data.get('score', 0)
+                skill['reason'] = ai_data.get('reason', '')
+                # Combined score: 40% keyword + 60% AI
+                skill['final_score'] = (
+                    0.4 * skill['keyword_score'] + 
+                    0.6 * skill['ai_score']
+                )
+            else:
+                skill['ai_score'] = 0
+                skill['final_score'] = skill['keyword_score'] * 0.4
     else:
-        for skill in skills_sorted:
-            skill['final_score'] = skill['keyword_score']
+        for skill in skills:
+            skill['final_score'] = _prerank_score(skill)
+    
+    # Final ranking by combined score, keyword score breaks ties
+    def rank(s):
+        return (s['final_score'], s['keyword_score'])
+    
+    if top_k is None:
+        return sorted(skills, key=rank, reverse=True)
+    return heapq.nlargest(top_k, skills, key=rank)
+
+
+def match_skills(task: str, use_ai: bool = True, top_k: Optional[int] = None,
+                 llm_rerank: bool = False) -> list[dict]:
+    """Match skills to task using hybrid approach.
+
+    Semantic scores come from local embeddings when available; Gemini is
+    used without them, or on top of them with llm_rerank.
+    Returns the top_k best skills, or all skills ranked when top_k is None.
+    """
+    index = load_skill_index()
+    skills = _keyword_scored_skills(task, index)
+    if not skills:
+        return []
+    
+    ai_results = []
+    if use_ai:
+        task_vector = _apply_local_semantic_scores(task, index, skills)
+        if task_vector is None or llm_rerank:
+            embedding = None if task_vector is None else task_vector.tolist()
+            ai_results = semantic_match_gemini(task, _top_for_ai(skills), embedding)
+    
+    return _rank_skills(skills, ai_results, top_k)
+
+
+async def match_skills_async(task: str, use_ai: bool = True, top_k: Optional[int] = None,
+                             llm_rerank: bool = False) -> list[dict]:
+    """Async match_skills; gather several calls to match tasks concurrently."""
+    index = load_skill_index()
+    skills = _keyword_scored_skills(task, index)
+    if not skills:
+        return []
+    
+    ai_results = []
+    if use_ai:
+        task_vector = await asyncio.to_thread(_apply_local_semantic_scores, task, index, skills)
+        if task_vector is None or llm_rerank:
+            embedding = None if task_vector is None else task_vector.tolist()
+            ai_results = await semantic_match_gemini_async(
+                task, _top_for_ai(skills), embedding
+            )
     
-    # Final sort by combined score
-    return sorted(skills_sorted, key=lambda s: s.get('final_score', 0), reverse=True)
+    return _rank_skills(skills, ai_results, top_k)
 
 
 def main():
     parser = argparse.ArgumentParser(description='Match skills to task')
     parser.add_argument('task', help='Task description')
     parser.add_argument('--no-ai', action='store_true', help='Skip AI matching')
+    parser.add_argument('--llm-rerank', action='store_true',
+                        help='Refine local embedding ranking with Gemini')
     parser.add_argument('--top', type=int, default=5, help='Number of results')
     parser.add_argument('--json', action='store_true', help='Output as JSON')
     
@@ -174,8 +587,8 @@ def main():
     
     print(f"🔍 Matching skills for: {args.task}\n")
     
-    results = match_skills(args.task, use_ai=not args.no_ai)
-    top_results = results[:args.top]
+    top_results = match_skills(args.task, use_ai=not args.no_ai, top_k=args.top,
+                               llm_rerank=args.llm_rerank)
     
     if args.json:
         output = [{
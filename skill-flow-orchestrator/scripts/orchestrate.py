@@ -6,6 +6,7 @@ Runs skill workflows based on mode and task.
 
 import os
 import json
+import time
 import argparse
 import asyncio
 from pathlib import Path
@@ -14,7 +15,12 @@ from typing import Optional
 from dataclasses import dataclass, field, asdict
 
 # Import local modules
-from match_skills import match_skills
+from match_skills import match_skills_async
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 
 @dataclass
@@ -46,14 +52,82 @@ class DAGNode:
     output: Optional[str] = None
 
 
+@dataclass
+class TemplateMatcher:
+    """Trigger patterns of all templates, matched in one pass over the task.
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed,
+    otherwise a substring scan. Earlier templates win, as in glob order.
+    """
+    templates: list[dict]
+    patterns: list[tuple[str, int]] = field(default_factory=list)
+    automaton: Optional[object] = None
+    match_all: Optional[int] = None  # First template with an empty pattern
+    
+    @classmethod
+    def build(cls, templates: list[dict]) -> 'TemplateMatcher':
+        matcher = cls(templates=templates)
+        for idx, tpl in enumerate(templates):
+            for pattern in tpl.get('trigger_patterns', []):
+                pattern = pattern.lower()
+                if not pattern:
+                    if matcher.match_all is None:
+                        matcher.match_all = idx
+                    continue
+                matcher.patterns.append((pattern, idx))
+        
+        if ahocorasick is not None and matcher.patterns:
+            automaton = ahocorasick.Automaton()
+            for pattern, idx in matcher.patterns:
+                # Keep the earliest template for shared patterns
+                if not automaton.exists(pattern):
+                    automaton.add_word(pattern, idx)
+            automaton.make_automaton()
+            matcher.automaton = automaton
+        return matcher
+    
+    def find(self, task: str) -> Optional[dict]:
+        """First template whose trigger pattern is in task."""
+        task_lower = task.lower()
+        hits = [] if self.match_all is None else [self.match_all]
+        if self.automaton is not None:
+            hits.extend(idx for _, idx in self.automaton.iter(task_lower))
+        else:
+            for pattern, idx in self.patterns:
+                if pattern in task_lower:
+                    hits.append(idx)
+                    break
+        return self.templates[min(hits)] if hits else None
+
+
+# Template matchers by templates dir, with the (name, mtime, size) of each
+# template file they were built from
+_TEMPLATE_MATCHERS: dict[str, tuple[tuple, TemplateMatcher]] = {}
+
+
 class Orchestrator:
     """Main orchestrator class."""
     
-    def __init__(self, mode: str = "STANDARD"):
+    def __init__(self, mode: str = "STANDARD", llm_rerank: bool = False):
         self.mode = mode.upper()
+        self.llm_rerank = llm_rerank
         self.sfo_dir = self._get_sfo_dir()
         self.context: Optional[ExecutionContext] = None
         self.dag: list[DAGNode] = []
+        self._log_fp = None
+        self._context_dirty = False
+    
+    def __enter__(self) -> 'Orchestrator':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Release the log file handle."""
+        if self._log_fp:
+            self._log_fp.close()
+            self._log_fp = None
         
     def _get_sfo_dir(self) -> Path:
         """Get SFO directory path."""
@@ -75,17 +149,25 @@ class Orchestrator:
             context_file = self.sfo_dir / "context.json"
             with open(context_file, 'w') as f:
                 json.dump(self.context.to_dict(), f, indent=2)
+        self._context_dirty = False
+    
+    def _save_context_if_dirty(self):
+        """Save context only if it changed since the last save."""
+        if self._context_dirty:
+            self._save_context()
     
     def _log_execution(self, message: str):
         """Log execution step."""
-        logs_dir = self.sfo_dir / "logs"
-        logs_dir.mkdir(parents=True, exist_ok=True)
+        if self._log_fp is None:
+            logs_dir = self.sfo_dir / "logs"
+            logs_dir.mkdir(parents=True, exist_ok=True)
+            
+            log_file = logs_dir / f"{time.strftime('%Y-%m-%d')}.log"
+            # Line buffered: one flush per entry, file stays open
+            self._log_fp = open(log_file, 'a', buffering=1)
         
-        log_file = logs_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
-        timestamp = datetime.now().isoformat()
-        
-        with open(log_file, 'a') as f:
-            f.write(f"[{timestamp}] [{self.mode}] {message}\n")
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime())
+        self._log_fp.write(f"[{timestamp}] [{self.mode}] {message}\n")
     
     def compose_dag(self, skills: list[dict]) -> list[DAGNode]:
         """Compose execution DAG from matched skills."""
@@ -116,15 +198,18 @@ class Orchestrator:
         
         context.outputs[node.id] = output
         context.current_step += 1
-        self._save_context()
+        # Saved once when the run ends, see run()
+        self._context_dirty = True
         
         return output
     
-    def run_quick(self, task: str):
+    async def run_quick(self, task: str):
         """QUICK mode: Single skill selection."""
         print("\n🚀 Running QUICK mode (1-2 min)")
         
-        skills = match_skills(task, use_ai=True)
+        skills = await match_skills_async(
+            task, use_ai=True, top_k=1, llm_rerank=self.llm_rerank
+        )
         if not skills:
             print("❌ No matching skills found")
             return
@@ -138,11 +223,13 @@ class Orchestrator:
         
         print(f"\n✅ Completed in QUICK mode")
     
-    def run_standard(self, task: str):
+    async def run_standard(self, task: str):
         """STANDARD mode: Multi-skill chain."""
         print("\n🚀 Running STANDARD mode (5-10 min)")
         
-        skills = match_skills(task, use_ai=True)[:3]
+        skills = await match_skills_async(
+            task, use_ai=True, top_k=3, llm_rerank=self.llm_rerank
+        )
         if not skills:
             print("❌ No matching skills found")
             return
@@ -160,11 +247,13 @@ class Orchestrator:
         
         print(f"\n✅ Completed chain with {len(self.dag)} skills")
     
-    def run_deep(self, task: str):
+    async def run_deep(self, task: str):
         """DEEP mode: Full DAG composition."""
         print("\n🚀 Running DEEP mode (15-30 min)")
         
-        skills = match_skills(task, use_ai=True)[:5]
+        skills = await match_skills_async(
+            task, use_ai=True, top_k=5, llm_rerank=self.llm_rerank
+        )
         if not skills:
             print("❌ No matching skills found")
             return
@@ -185,34 +274,56 @@ class Orchestrator:
         self._save_template(task)
         print(f"\n✅ Completed DAG and saved template")
     
-    def run_expert(self, task: str):
+    async def run_expert(self, task: str):
         """EXPERT mode: Template-first with optimization."""
         print("\n🚀 Running EXPERT mode (custom)")
         
         # Try to load existing template
-        template = self._find_template(task)
+        template = await self._find_template(task)
         
         if template:
             print(f"\n📄 Found template: {template['name']}")
             self._execute_template(template)
         else:
             print("\n📝 No template found, running DEEP mode")
-            self.run_deep(task)
+            await self.run_deep(task)
     
-    def _find_template(self, task: str) -> Optional[dict]:
-        """Find matching template for task."""
+    @staticmethod
+    def _load_template(tpl_file: Path) -> dict:
+        """Load a template file."""
+        return json.loads(tpl_file.read_bytes())
+    
+    async def _get_template_matcher(self) -> Optional[TemplateMatcher]:
+        """Get the template matcher, rebuilt when any template file changes."""
         templates_dir = self.sfo_dir / "templates"
         if not templates_dir.exists():
             return None
         
-        for tpl_file in templates_dir.glob("*.json"):
-            with open(tpl_file, 'r') as f:
-                tpl = json.load(f)
-                patterns = tpl.get('trigger_patterns', [])
-                for pattern in patterns:
-                    if pattern.lower() in task.lower():
-                        return tpl
-        return None
+        tpl_files = list(templates_dir.glob("*.json"))
+        stats = [tpl_file.stat() for tpl_file in tpl_files]
+        signature = tuple(
+            (tpl_file.name, st.st_mtime_ns, st.st_size)
+            for tpl_file, st in zip(tpl_files, stats)
+        )
+        cached = _TEMPLATE_MATCHERS.get(str(templates_dir))
+        if cached and cached[0] == signature:
+            return cached[1]
+        
+        # Read all templates concurrently
+        templates = await asyncio.gather(*[
+            asyncio.to_thread(self._load_template, tpl_file)
+            for tpl_file in tpl_files
+        ])
+        matcher = TemplateMatcher.build(list(templates))
+        _TEMPLATE_MATCHERS[str(templates_dir)] = (signature, matcher)
+        return matcher
+    
+    async def _find_template(self, task: str) -> Optional[dict]:
+        """Find matching template for task."""
+        matcher = await self._get_template_matcher()
+        if matcher is None:
+            return None
+        return matcher.find(task)
     
     def _execute_template(self, template: dict):
         """Execute a saved template."""
@@ -239,7 +350,7 @@ class Orchestrator:
         
         self._log_execution(f"Saved template: {template['name']}")
     
-    def run(self, task: str):
+    async def run(self, task: str):
         """Main entry point."""
         self.context = ExecutionContext(task=task, mode=self.mode)
         self._save_context()
@@ -248,17 +359,20 @@ class Orchestrator:
         print(f"🎯 Task: {task}")
         print(f"⚙️  Mode: {self.mode}")
         
-        if self.mode == "QUICK":
-            self.run_quick(task)
-        elif self.mode == "STANDARD":
-            self.run_standard(task)
-        elif self.mode == "DEEP":
-            self.run_deep(task)
-        elif self.mode == "EXPERT":
-            self.run_expert(task)
-        else:
-            print(f"❌ Unknown mode: {self.mode}")
-            return
+        try:
+            if self.mode == "QUICK":
+                await self.run_quick(task)
+            elif self.mode == "STANDARD":
+                await self.run_standard(task)
+            elif self.mode == "DEEP":
+                await self.run_deep(task)
+            elif self.mode == "EXPERT":
+                await self.run_expert(task)
+            else:
+                print(f"❌ Unknown mode: {self.mode}")
+                return
+        finally:
+            self._save_context_if_dirty()
         
         self._log_execution(f"Completed orchestration")
 
@@ -269,11 +383,13 @@ def main():
     parser.add_argument('--mode', '-m', default='STANDARD',
                        choices=['QUICK', 'STANDARD', 'DEEP', 'EXPERT'],
                        help='Orchestration mode')
+    parser.add_argument('--llm-rerank', action='store_true',
+                       help='Refine local embedding ranking with Gemini')
     
     args = parser.parse_args()
     
-    orchestrator = Orchestrator(mode=args.mode)
-    orchestrator.run(args.task)
+    with Orchestrator(mode=args.mode, llm_rerank=args.llm_rerank) as orchestrator:
+        asyncio.run(orchestrator.run(args.task))
 
 
 if __name__ == "__main__":
@@ -8,54 +8,143 @@ import os
 import re
 import json
 import yaml
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List
 
+import embeddings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# libyaml C loader when available
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+_FRONTMATTER_RE = re.compile(r'^---\s*\n(.*?)\n---', re.DOTALL)
+
+# Frontmatter almost always fits in this many bytes
+_FRONTMATTER_READ_SIZE = 8192
+
+# Same tokenizer match_skills applies to tasks
+_TOKEN_RE = re.compile(r'\b[a-z][a-z0-9-]{2,}\b')
+
+# Action words
+_ACTION_PATTERNS = [
+    r'build|create|generate|implement|develop|design',
+    r'analyze|debug|test|validate|review|optimize',
+    r'deploy|configure|setup|install|manage',
+    r'process|transform|convert|parse|extract',
+    r'search|query|fetch|retrieve|discover',
+    r'authenticate|authorize|login|auth|oauth|jwt|session',
+    r'payment|checkout|stripe|billing|subscription',
+    r'database|db|sql|nosql|schema|migration',
+    r'frontend|backend|fullstack|full-stack|api',
+    r'mobile|ios|android|native|app',
+    r'cloud|serverless|docker|kubernetes|k8s',
+    r'ui|ux|design|styling|component|layout',
+    r'image|video|audio|media|file',
+    r'chart|graph|visualization|dashboard',
+    r'e-commerce|ecommerce|shop|store|cart',
+]
+
+# Technology names (case insensitive)
+_TECH_PATTERNS = [
+    r'react|next\.?js|vue|angular|svelte|remix',
+    r'node\.?js|python|typescript|javascript|go|rust',
+    r'mongodb|postgresql|postgres|redis|mysql|sqlite',
+    r'docker|kubernetes|aws|gcp|azure|cloudflare',
+    r'api|rest|graphql|grpc|websocket',
+    r'css|html|tailwind|sass|scss',
+    r'express|fastapi|nestjs|django|flask',
+    r'stripe|paypal|sepay|polar',
+    r'gemini|openai|anthropic|claude|gpt',
+    r'mcp|mern|jamstack',
+    r'three\.?js|webgl|canvas|svg',
+    r'shopify|woocommerce|magento',
+]
+
+_ACTION_TECH_RE = re.compile(
+    r'\b(' + '|'.join(_ACTION_PATTERNS + _TECH_PATTERNS) + r')\b'
+)
+
+# Significant words (4+ chars)
+_WORD_RE = re.compile(r'\b([a-z][a-z0-9-]{3,})\b')
+
+_STOP_WORDS = frozenset({
+    'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would',
+    'could', 'should', 'when', 'where', 'what', 'which', 'their',
+    'there', 'these', 'those', 'your', 'about', 'into', 'over',
+    'such', 'only', 'other', 'some', 'than', 'then', 'them', 'well',
+    'also', 'back', 'after', 'most', 'made', 'being', 'through',
+    'using', 'used', 'uses', 'need', 'needs', 'like', 'make', 'just',
+})
+
 
 def parse_yaml_frontmatter(content: str) -> dict:
     """Extract YAML frontmatter from markdown."""
-    match = re.match(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
+    match = _FRONTMATTER_RE.match(content)
     if match:
         try:
-            return yaml.safe_load(match.group(1)) or {}
+            return yaml.load(match.group(1), Loader=_YamlLoader) or {}
         except yaml.YAMLError:
             return {}
     return {}
 
 
+def read_frontmatter_text(skill_md: Path) -> str:
+    """Read SKILL.md only up to the closing frontmatter fence."""
+    with open(skill_md, 'rb') as f:
+        head = f.read(_FRONTMATTER_READ_SIZE)
+        # Closing fence, past the opening "---\n"
+        end = head.find(b'\n---', 4)
+        if end < 0 and len(head) == _FRONTMATTER_READ_SIZE:
+            head += f.read()
+            end = head.find(b'\n---', 4)
+    if end >= 0:
+        head = head[:end + 4]
+    return head.decode('utf-8', errors='replace')
+
+
 def extract_skill_dna(skill_path: Path) -> Optional[dict]:
     """Extract skill DNA from SKILL.md."""
     skill_md = skill_path / "SKILL.md"
     if not skill_md.exists():
         return None
 
-    content = skill_md.read_text(encoding='utf-8')
+    content = read_frontmatter_text(skill_md)
     frontmatter = parse_yaml_frontmatter(content)
 
     if not frontmatter.get('name') or not frontmatter.get('description'):
         return None
 
     # Extract keywords from description
+    name = frontmatter.get('name')
     description = frontmatter.get('description', '')
     keywords = extract_keywords(description)
 
+    # Lowercased match fields, precomputed once for match_skills
+    name_words = name.lower().replace('-', ' ').split()
+    description_tokens = sorted(set(_TOKEN_RE.findall(description.lower())))
+
     # Check for scripts
-    scripts_dir = skill_path / "scripts"
-    scripts = []
-    if scripts_dir.exists():
-        scripts = [f.name for f in scripts_dir.iterdir() if f.is_file()]
+    scripts = list_files(skill_path / "scripts")
 
     # Check for references
-    refs_dir = skill_path / "references"
-    references = []
-    if refs_dir.exists():
-        references = [f.name for f in refs_dir.iterdir() if f.is_file()]
+    references = list_files(skill_path / "references")
 
     return {
-        "name": frontmatter.get('name'),
+        "name": name,
         "description": description,
         "keywords": keywords,
+        "name_words": name_words,
+        "description_tokens": description_tokens,
         "scripts": scripts,
         "references": references,
         "path": str(skill_path),
@@ -63,85 +152,49 @@ def extract_skill_dna(skill_path: Path) -> Optional[dict]:
     }
 
 
+def list_files(dir_path: Path) -> List[str]:
+    """List file names in a directory, empty if it does not exist."""
+    try:
+        with os.scandir(dir_path) as it:
+            return [entry.name for entry in it if entry.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
 def extract_keywords(text: str) -> List[str]:
     """Extract keywords from description text."""
-    keywords = set()
     text_lower = text.lower()
 
-    # Action words
-    action_patterns = [
-        r'\b(build|create|generate|implement|develop|design)\b',
-        r'\b(analyze|debug|test|validate|review|optimize)\b',
-        r'\b(deploy|configure|setup|install|manage)\b',
-        r'\b(process|transform|convert|parse|extract)\b',
-        r'\b(search|query|fetch|retrieve|discover)\b',
-        r'\b(authenticate|authorize|login|auth|oauth|jwt|session)\b',
-        r'\b(payment|checkout|stripe|billing|subscription)\b',
-        r'\b(database|db|sql|nosql|schema|migration)\b',
-        r'\b(frontend|backend|fullstack|full-stack|api)\b',
-        r'\b(mobile|ios|android|native|app)\b',
-        r'\b(cloud|serverless|docker|kubernetes|k8s)\b',
-        r'\b(ui|ux|design|styling|component|layout)\b',
-        r'\b(image|video|audio|media|file)\b',
-        r'\b(chart|graph|visualization|dashboard)\b',
-        r'\b(e-commerce|ecommerce|shop|store|cart)\b',
-    ]
-
-    for pattern in action_patterns:
-        matches = re.findall(pattern, text_lower)
-        keywords.update(matches)
-
-    # Technology names (case insensitive)
-    tech_patterns = [
-        r'\b(react|next\.?js|vue|angular|svelte|remix)\b',
-        r'\b(node\.?js|python|typescript|javascript|go|rust)\b',
-        r'\b(mongodb|postgresql|postgres|redis|mysql|sqlite)\b',
-        r'\b(docker|kubernetes|aws|gcp|azure|cloudflare)\b',
-        r'\b(api|rest|graphql|grpc|websocket)\b',
-        r'\b(css|html|tailwind|sass|scss)\b',
-        r'\b(express|fastapi|nestjs|django|flask)\b',
-        r'\b(stripe|paypal|sepay|polar)\b',
-        r'\b(gemini|openai|anthropic|claude|gpt)\b',
-        r'\b(mcp|mern|jamstack)\b',
-        r'\b(three\.?js|webgl|canvas|svg)\b',
-        r'\b(shopify|woocommerce|magento)\b',
-    ]
-
-    for pattern in tech_patterns:
-        matches = re.findall(pattern, text_lower)
-        keywords.update(matches)
+    # Action words and technology names, in a single pass
+    action_tech_matches = _ACTION_TECH_RE.findall(text_lower)
 
     # Extract significant words (4+ chars, not common words)
-    stop_words = {'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would',
-                  'could', 'should', 'when', 'where', 'what', 'which', 'their',
-                  'there', 'these', 'those', 'your', 'about', 'into', 'over',
-                  'such', 'only', 'other', 'some', 'than', 'then', 'them', 'well',
-                  'also', 'back', 'after', 'most', 'made', 'being', 'through',
-                  'using', 'used', 'uses', 'need', 'needs', 'like', 'make', 'just'}
-
-    words = re.findall(r'\b([a-z][a-z0-9-]{3,})\b', text_lower)
-    for word in words:
-        if word not in stop_words and not word.startswith('http'):
-            keywords.add(word)
+    word_matches = [
+        word for word in _WORD_RE.findall(text_lower)
+        if word not in _STOP_WORDS and not word.startswith('http')
+    ]
 
-    return list(keywords)
+    return list(set(chain(action_tech_matches, word_matches)))
 
 
 def scan_skills(skills_dir: Path) -> List[dict]:
-    """Scan all skills in directory."""
-    skills = []
-
-    for item in skills_dir.iterdir():
-        if not item.is_dir():
-            continue
-        if item.name.startswith('.') or item.name == 'common':
-            continue
+    """Scan all skills in directory.
 
-        dna = extract_skill_dna(item)
-        if dna:
-            skills.append(dna)
+    SKILL.md reads are I/O bound, so skills are parsed on a thread pool.
+    Results keep directory order.
+    """
+    with os.scandir(skills_dir) as it:
+        skill_paths = [
+            Path(entry.path) for entry in it
+            if entry.is_dir()
+            and not entry.name.startswith('.')
+            and entry.name != 'common'
+        ]
 
-    return skills
+    max_workers = min(32, (os.cpu_count() or 4) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(extract_skill_dna, skill_paths)
+        return [dna for dna in results if dna]
 
 
 def main():
@@ -158,20 +211,33 @@ def main():
     print(f"📂 Scanning skills in: {skills_root}")
     skills = scan_skills(skills_root)
 
+    # Precompute description embeddings for local semantic matching
+    vectors = embeddings.embed([s['description'] for s in skills])
+    if vectors is not None:
+        for skill, vector in zip(skills, vectors):
+            skill['embedding'] = embeddings.encode_vector(vector)
+
     # Build index
     index = {
         "version": "1.0.0",
         "generated_at": datetime.now().isoformat(),
         "skills_count": len(skills),
+        "embedding_model": embeddings.model_id() if vectors is not None else None,
+        "embedding_dim": int(vectors.shape[1]) if vectors is not None else None,
         "skills": skills
     }
 
     # Save index
     output_file = sfo_dir / "skill_index.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(index, f, indent=2, ensure_ascii=False)
+    if orjson:
+        output_file.write_bytes(orjson.dumps(index, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
 
     print(f"✅ Indexed {len(skills)} skills")
+    if vectors is not None:
+        print(f"🧠 Embedded {len(vectors)} skill descriptions")
     print(f"📄 Output: {output_file}")
 
     # Print summary